@@ -3,35 +3,67 @@ FastAPI backend for server control panel
 Automatically discovers and loads modules from the modules directory
 """
 
-from fastapi import FastAPI, Request, Depends, HTTPException, Form, File, UploadFile, status
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi import FastAPI, Request, HTTPException, Form, File, UploadFile, status
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, ORJSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.sessions import SessionMiddleware
 import bcrypt
+import hashlib
+import hmac
 import importlib
-import inspect
+import orjson
 import os
 import sys
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Optional
-from module_base import ModuleBase
-import tomli
+from typing import Any, Callable, Dict, List, Optional
+from module_base import CONFIG_PATH, ModuleBase, load_config
+from middleware import AuthGateMiddleware, SessionASGIMiddleware, current_session, is_authenticated
 import base64
 
+# Project paths, resolved once at import
+BASE_DIR = Path(__file__).resolve().parent.parent
+MODULES_DIR = BASE_DIR / "modules"
+MODULES_DIR_STR = str(MODULES_DIR)
+
+# Make module files importable by name
+if MODULES_DIR_STR not in sys.path:
+    sys.path.insert(0, MODULES_DIR_STR)
+
 # Load configuration from config.toml
-config_path = Path(__file__).parent.parent / 'config.toml'
-with open(config_path, 'rb') as f:
-    config = tomli.load(f)
+config = load_config()
 
-app = FastAPI(title="Server Control Panel")
+app = FastAPI(title="Server Control Panel", default_response_class=ORJSONResponse)
+
+# Authentication credentials (from config.toml)
+AUTH_USERNAME = config.get('server', {}).get('admin_username', 'admin')
+AUTH_PASSWORD = config.get('server', {}).get('admin_password', 'admin')
+# Hash the password from config
+AUTH_PASSWORD_HASH = bcrypt.hashpw(AUTH_PASSWORD.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
 # Session configuration
 SECRET_KEY = config.get('server', {}).get('secret_key', 'dev-secret-key-change-in-production')
+
+# Token stored in the session after a successful login. bcrypt only runs on
+# POST /login; every other request compares this token in constant time.
+# Derived from the secret key so all workers agree, but never from the
+# password: the session cookie is signed, not encrypted, so its contents
+# must not allow an offline password search. Changing the secret key or
+# username invalidates existing sessions.
+AUTH_TOKEN = hmac.new(
+    SECRET_KEY.encode('utf-8'),
+    f"auth-token:{AUTH_USERNAME}".encode('utf-8'),
+    hashlib.sha256
+).hexdigest()
+
+# Authentication gate - added first so it runs inside the session middleware
+app.add_middleware(AuthGateMiddleware, token=AUTH_TOKEN, login_url="/login")
+
+# Session middleware
 app.add_middleware(
-    SessionMiddleware,
-    secret_key=SECRET_KEY,
+    SessionASGIMiddleware,
+    secret=SECRET_KEY,
     session_cookie="session",
     max_age=3600,
     same_site="lax",
@@ -48,138 +80,214 @@ app.add_middleware(
 )
 
 # Static files and templates - use absolute paths
-base_dir = Path(__file__).parent.parent
-app.mount("/static", StaticFiles(directory=str(base_dir / "static")), name="static")
-templates = Jinja2Templates(directory=str(base_dir / "templates"))
-
-# Authentication credentials (from config.toml)
-AUTH_USERNAME = config.get('server', {}).get('admin_username', 'admin')
-AUTH_PASSWORD = config.get('server', {}).get('admin_password', 'admin')
-# Hash the password from config
-AUTH_PASSWORD_HASH = bcrypt.hashpw(AUTH_PASSWORD.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-
-# Store loaded modules
-modules: Dict[str, ModuleBase] = {}
-
-
-async def get_session(request: Request):
-    """Get session from request"""
-    return request.session
-
-
-async def require_authentication(request: Request):
-    """Dependency to require authentication"""
-    if 'authenticated' not in request.session:
-        if request.url.path.startswith('/api/'):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Authentication required"
-            )
-        raise HTTPException(
-            status_code=status.HTTP_303_SEE_OTHER,
-            headers={"Location": "/login"}
-        )
-    return request.session
+app.mount("/static", StaticFiles(directory=str(BASE_DIR / "static")), name="static")
+templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
+
+# Loaded modules, laid out as parallel lists so /api/modules walks plain
+# sequences instead of doing attribute lookups on every instance
+module_ids: List[str] = []
+module_instances: List[ModuleBase] = []
+static_blobs: List[bytes] = []
+status_fns: List[Callable[[], Dict[str, Any]]] = []
+actions_fns: List[Optional[Callable[[], bytes]]] = []  # actions JSON, None unless dynamic_actions
+module_index: Dict[str, int] = {}
+
+# Modification time of each module file when it was last imported, and the
+# modules instantiated from it, so reloads only touch changed files
+_module_mtime_cache: Dict[str, float] = {}
+_modules_by_file: Dict[str, List[ModuleBase]] = {}
+# Modification time of config.toml when modules were last instantiated
+_config_mtime: Optional[float] = None
 
 
 def discover_modules():
-    """Discover and load all modules from the modules directory"""
-    global modules
-    modules = {}
-
-    # Add modules directory to Python path
-    modules_dir = Path(__file__).parent.parent / "modules"
-    if str(modules_dir) not in sys.path:
-        sys.path.insert(0, str(modules_dir))
-
-    if not modules_dir.exists():
-        print(f"Warning: modules directory not found at {modules_dir}")
+    """Discover and load modules, re-importing only files that changed
+    (or every file when config.toml changed)"""
+    if not os.path.isdir(MODULES_DIR_STR):
+        print(f"Warning: modules directory not found at {MODULES_DIR_STR}")
         return
 
-    # Find all Python files in modules directory
-    for file_path in modules_dir.glob("*.py"):
-        if file_path.name.startswith("_"):
-            continue
-
-        module_name = file_path.stem
-
-        try:
-            # Import the module
-            module = importlib.import_module(module_name)
-
-            # Find all classes that inherit from ModuleBase
-            for name, obj in inspect.getmembers(module, inspect.isclass):
-                if issubclass(obj, ModuleBase) and obj != ModuleBase:
-                    # Instantiate the module
-                    module_instance = obj()
-                    module_id = obj.__name__.lower()
-                    modules[module_id] = module_instance
-                    print(f"✓ Loaded module: {module_instance.name} ({module_id})")
-
-        except Exception as e:
-            print(f"✗ Error loading module {module_name}: {e}")
+    # Modules read config.toml when instantiated, so an edited config
+    # rebuilds every module, not only changed files
+    global _config_mtime
+    try:
+        config_mtime = os.stat(CONFIG_PATH).st_mtime
+    except OSError:
+        config_mtime = None
+    if config_mtime != _config_mtime:
+        load_config.cache_clear()
+        _module_mtime_cache.clear()
+        _config_mtime = config_mtime
+
+    # Pick up module files added since the last import
+    importlib.invalidate_caches()
+    seen_files = set()
 
-    print(f"\nTotal modules loaded: {len(modules)}")
+    # Find all Python files in modules directory
+    with os.scandir(MODULES_DIR_STR) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".py") or entry.name.startswith("_") or not entry.is_file():
+                continue
+
+            seen_files.add(entry.name)
+            mtime = entry.stat().st_mtime
+            if _module_mtime_cache.get(entry.name) == mtime:
+                continue
+
+            module_name = entry.name[:-3]
+            _unload_module_file(entry.name)
+            loaded_modules = _modules_by_file[entry.name] = []
+
+            try:
+                # Import the module, or re-execute it if it was loaded before
+                if module_name in sys.modules:
+                    importlib.reload(sys.modules[module_name])
+                else:
+                    importlib.import_module(module_name)
+
+                # Instantiate the concrete ModuleBase subclasses defined in the file
+                for obj in ModuleBase._REGISTRY:
+                    if obj.__module__ == module_name and not obj.__abstractmethods__:
+                        # Instantiate the module
+                        module_instance = obj()
+                        module_id = obj._module_id
+                        # Serialized without the opening brace so the live
+                        # status can be spliced in front of it per request
+                        static_json = orjson.dumps({
+                            "id": module_id,
+                            "name": module_instance.name,
+                            "description": module_instance.description,
+                            "icon": module_instance.icon,
+                            "color": module_instance.color,
+                        })[1:]
+                        if not module_instance.dynamic_actions:
+                            static_json = static_json[:-1] + b',"actions":' + _actions_json(module_instance) + b'}'
+                        module_instance._static_json = static_json
+                        loaded_modules.append(module_instance)
+                        print(f"✓ Loaded module: {module_instance.name} ({module_id})")
+
+                _module_mtime_cache[entry.name] = mtime
+
+            except Exception as e:
+                print(f"✗ Error loading module {module_name}: {e}")
+
+    # Drop modules whose files were deleted
+    for file_name in list(_modules_by_file):
+        if file_name not in seen_files:
+            _unload_module_file(file_name)
+
+    _rebuild_registry()
+    print(f"\nTotal modules loaded: {len(module_ids)}")
+
+
+def _unload_module_file(file_name: str):
+    """Forget the modules instantiated from a module file"""
+    _module_mtime_cache.pop(file_name, None)
+    _modules_by_file.pop(file_name, None)
+    # Drop classes registered by a previous import of the file
+    module_name = file_name[:-3]
+    ModuleBase._REGISTRY[:] = [cls for cls in ModuleBase._REGISTRY if cls.__module__ != module_name]
+
+
+def _actions_json(module_instance: ModuleBase) -> bytes:
+    """Actions as a JSON array, preferring the module's pre-encoded bytes"""
+    actions_json = module_instance.get_actions_json()
+    if actions_json is None:
+        actions_json = orjson.dumps(module_instance.get_actions())
+    return actions_json
+
+
+def _rebuild_registry():
+    """Refill the parallel module lists from the per-file instances"""
+    # Later definitions win when two classes share an id
+    by_id = {}
+    for file_modules in _modules_by_file.values():
+        for module_instance in file_modules:
+            by_id[module_instance._module_id] = module_instance
+
+    module_ids[:] = by_id.keys()
+    module_instances[:] = by_id.values()
+    static_blobs[:] = [m._static_json for m in module_instances]
+    status_fns[:] = [m.get_status for m in module_instances]
+    actions_fns[:] = [partial(_actions_json, m) if m.dynamic_actions else None for m in module_instances]
+    module_index.clear()
+    module_index.update((module_id, i) for i, module_id in enumerate(module_ids))
+
+
+def _verify_credentials(username: str, password: str) -> bool:
+    """
+    Check both login fields with the same amount of work whichever is wrong
+    bcrypt always runs, the username is compared in constant time and the
+    results are combined with & so nothing short-circuits. An empty
+    configured username never matches but still pays for the bcrypt check.
+    """
+    password_ok = bcrypt.checkpw(password.encode('utf-8'), AUTH_PASSWORD_HASH.encode('utf-8'))
+    username_ok = hmac.compare_digest(username.encode('utf-8'), AUTH_USERNAME.encode('utf-8'))
+    return bool(AUTH_USERNAME) & username_ok & password_ok
 
 
 @app.get('/login', response_class=HTMLResponse)
 async def login_page(request: Request):
     """Display login page"""
     # If already authenticated, redirect to main page
-    if 'authenticated' in request.session:
+    if is_authenticated(current_session(), AUTH_TOKEN):
         return RedirectResponse(url='/', status_code=status.HTTP_303_SEE_OTHER)
     return templates.TemplateResponse('login.html', {'request': request})
 
 
 @app.post('/login')
 async def login_submit(
-    request: Request,
     username: str = Form(...),
     password: str = Form(...)
 ):
     """Handle login authentication"""
-    password_matches = bcrypt.checkpw(
-        password.encode('utf-8'),
-        AUTH_PASSWORD_HASH.encode('utf-8')
-    )
-    if username == AUTH_USERNAME and password_matches:
-        request.session['authenticated'] = True
-        request.session['username'] = username
+    if _verify_credentials(username, password):
+        session = current_session()
+        session['auth_token'] = AUTH_TOKEN
+        session['username'] = username
         return RedirectResponse(url='/', status_code=status.HTTP_303_SEE_OTHER)
     else:
         return RedirectResponse(url='/login?error=invalid', status_code=status.HTTP_303_SEE_OTHER)
 
 
 @app.get('/logout')
-async def logout(request: Request):
+async def logout():
     """Log out the current user"""
-    request.session.clear()
+    current_session().clear()
     return RedirectResponse(url='/login', status_code=status.HTTP_303_SEE_OTHER)
 
 
 @app.get('/', response_class=HTMLResponse)
-async def index(request: Request, session=Depends(require_authentication)):
+async def index(request: Request):
     """Serve the main control panel page"""
     return templates.TemplateResponse('index.html', {'request': request})
 
 
 @app.get('/api/modules')
-async def get_modules_api(session=Depends(require_authentication)):
+async def get_modules_api():
     """Get all available modules and their current state"""
-    return {
-        "success": True,
-        "modules": [module.get_module_data() for module in modules.values()]
-    }
+    parts = []
+    for static_json, status_fn, actions_fn in zip(static_blobs, status_fns, actions_fns):
+        dynamic_json = orjson.dumps(status_fn())
+        if actions_fn is not None:
+            dynamic_json += b',"actions":' + actions_fn()
+        parts.append(b'{"status":' + dynamic_json + b',' + static_json)
+
+    return Response(
+        content=b'{"success":true,"modules":[' + b','.join(parts) + b']}',
+        media_type="application/json"
+    )
 
 
 @app.get('/api/modules/{module_id}/status')
-async def get_module_status_api(module_id: str, session=Depends(require_authentication)):
+async def get_module_status_api(module_id: str):
     """Get status for a specific module"""
-    if module_id not in modules:
+    index = module_index.get(module_id)
+    if index is None:
         raise HTTPException(status_code=404, detail="Module not found")
 
     try:
-        module_status = modules[module_id].get_status()
+        module_status = status_fns[index]()
         return {"success": True, "status": module_status}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -188,46 +296,46 @@ async def get_module_status_api(module_id: str, session=Depends(require_authenti
 @app.post('/api/modules/{module_id}/action')
 async def execute_module_action_api(
     module_id: str,
-    request: Request,
-    session=Depends(require_authentication)
+    request: Request
 ):
     """Execute an action on a specific module"""
-    if module_id not in modules:
-        raise HTTPException(status_code=404, detail="Module not found")
-
     data = await request.json()
     action_id = data.get('action_id')
     params = data.get('params', {})
 
+    # Resolved after reading the body: a reload during the await rebuilds
+    # the registry lists, so an earlier index could point at another module
+    index = module_index.get(module_id)
+    if index is None:
+        raise HTTPException(status_code=404, detail="Module not found")
+    module = module_instances[index]
+
     if not action_id:
         raise HTTPException(status_code=400, detail="action_id is required")
 
     try:
-        result = modules[module_id].execute_action(action_id, params)
+        result = await module.execute_action_async(action_id, params)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get('/api/reload')
-async def reload_modules_api(session=Depends(require_authentication)):
-    """Reload all modules (useful for development)"""
+async def reload_modules_api():
+    """Reload changed, added and removed modules (useful for development)"""
     try:
         discover_modules()
         return {
             "success": True,
-            "message": f"Reloaded {len(modules)} modules",
-            "modules": list(modules.keys())
+            "message": f"Reloaded {len(module_ids)} modules",
+            "modules": list(module_ids)
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post('/api/upload-images')
-async def upload_images_api(
-    files: List[UploadFile] = File(...),
-    session=Depends(require_authentication)
-):
+async def upload_images_api(files: List[UploadFile] = File(...)):
     """Handle image uploads and return base64 encoded images"""
     if len(files) > 10:
         raise HTTPException(status_code=400, detail="Maximum 10 images allowed")
@@ -250,7 +358,7 @@ async def upload_images_api(
 
 
 @app.get('/split-receipt', response_class=HTMLResponse)
-async def split_receipt_page(request: Request, session=Depends(require_authentication)):
+async def split_receipt_page(request: Request):
     """Serve the split receipt page"""
     return templates.TemplateResponse('split_receipt.html', {'request': request})
 
@@ -263,3 +371,18 @@ async def startup_event():
     print("=" * 50)
     discover_modules()
     print("=" * 50)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # Module state (receipt sessions, service status) lives in process
+    # memory, so only raise WORKERS for deployments that don't rely on it
+    uvicorn.run(
+        "app:app",
+        host="0.0.0.0",
+        port=5001,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.environ.get("WORKERS", "1"))
+    )
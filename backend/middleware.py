@@ -0,0 +1,143 @@
+"""
+Pure ASGI middleware for the control panel.
+Avoids the per-request Request/Response allocations of BaseHTTPMiddleware.
+"""
+
+import hmac
+import json
+from base64 import b64decode, b64encode
+from contextvars import ContextVar
+from typing import Optional
+
+from itsdangerous import BadSignature, TimestampSigner
+
+# Session of the request being handled, decoded once by SessionASGIMiddleware
+_session_ctx: ContextVar[Optional[dict]] = ContextVar("session", default=None)
+
+
+def current_session() -> dict:
+    """Session dict of the current request"""
+    return _session_ctx.get()
+
+
+def is_authenticated(session: dict, token: str) -> bool:
+    """Check the session's login token in constant time"""
+    session_token = session.get("auth_token")
+    return isinstance(session_token, str) and hmac.compare_digest(session_token, token)
+
+
+class SessionASGIMiddleware:
+    """Signed cookie session exposed via current_session() and scope["session"]
+
+    Cookie format is compatible with starlette's SessionMiddleware, so
+    existing sessions survive the switch. The cookie is only re-issued
+    when a handler actually changes the session.
+    """
+
+    def __init__(self, app, secret: str, session_cookie: str = "session",
+                 max_age: int = 3600, same_site: str = "lax", https_only: bool = False):
+        self.app = app
+        self.signer = TimestampSigner(str(secret))
+        self.max_age = max_age
+        self.cookie_prefix = session_cookie.encode("latin-1") + b"="
+        self.set_cookie_prefix = f"{session_cookie}="
+        self.cookie_attrs = f"; path=/; Max-Age={max_age}; httponly; samesite={same_site}"
+        self.clear_cookie = (
+            f"{session_cookie}=null; path=/; expires=Thu, 01 Jan 1970 00:00:00 GMT; "
+            f"httponly; samesite={same_site}"
+        )
+        if https_only:
+            self.cookie_attrs += "; secure"
+            self.clear_cookie += "; secure"
+
+    def _read_cookie(self, headers) -> dict:
+        """Decode the session cookie from raw ASGI headers"""
+        for name, value in headers:
+            if name != b"cookie":
+                continue
+            for chunk in value.split(b";"):
+                chunk = chunk.strip()
+                if chunk.startswith(self.cookie_prefix):
+                    try:
+                        data = self.signer.unsign(chunk[len(self.cookie_prefix):], max_age=self.max_age)
+                        return json.loads(b64decode(data))
+                    except (BadSignature, ValueError):
+                        return {}
+        return {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        session = self._read_cookie(scope["headers"])
+        initial = dict(session)
+        scope["session"] = session
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                if session != initial:
+                    if session:
+                        data = b64encode(json.dumps(session).encode("utf-8"))
+                        cookie = self.set_cookie_prefix + self.signer.sign(data).decode("utf-8") + self.cookie_attrs
+                    else:
+                        cookie = self.clear_cookie
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"set-cookie", cookie.encode("latin-1"))
+                    ]
+            await send(message)
+
+        token = _session_ctx.set(session)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _session_ctx.reset(token)
+
+
+class AuthGateMiddleware:
+    """Reject unauthenticated requests before routing
+
+    Must sit inside SessionASGIMiddleware. API requests get a 401, page
+    requests are redirected to the login page.
+    """
+
+    UNAUTHORIZED_BODY = b'{"detail":"Authentication required"}'
+    UNAUTHORIZED_HEADERS = (
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(UNAUTHORIZED_BODY)).encode("latin-1")),
+    )
+
+    def __init__(self, app, token: str, login_url: str = "/login",
+                 public_paths=("/login", "/logout"), public_prefixes=("/static/",)):
+        self.app = app
+        self.token = token
+        self.public_paths = frozenset(public_paths)
+        self.public_prefixes = tuple(public_prefixes)
+        self.redirect_headers = (
+            (b"location", login_url.encode("latin-1")),
+            (b"content-length", b"0"),
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        if (
+            is_authenticated(_session_ctx.get(), self.token)
+            or path in self.public_paths
+            or path.startswith(self.public_prefixes)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        # Outer middleware may add headers in place, so always send fresh lists
+        if path.startswith("/api/"):
+            await send({"type": "http.response.start", "status": 401,
+                        "headers": list(self.UNAUTHORIZED_HEADERS)})
+            await send({"type": "http.response.body", "body": self.UNAUTHORIZED_BODY})
+        else:
+            await send({"type": "http.response.start", "status": 303,
+                        "headers": list(self.redirect_headers)})
+            await send({"type": "http.response.body", "body": b""})
@@ -3,13 +3,52 @@ Base class for all server control modules.
 Each module should inherit from this class and implement the required methods.
 """
 
+import asyncio
+import functools
+import sys
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Optional
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    import tomli as tomllib
+
+CONFIG_PATH = Path(__file__).resolve().parent.parent / 'config.toml'
+
+
+@functools.lru_cache(maxsize=1)
+def load_config() -> Dict[str, Any]:
+    """Parse config.toml once per module discovery and share the result"""
+    with open(CONFIG_PATH, 'rb') as f:
+        return tomllib.load(f)
 
 
 class ModuleBase(ABC):
     """Base class for all control modules"""
 
+    # Set to True when get_actions() depends on module state; otherwise the
+    # actions are computed once at discovery and cached with the metadata
+    dynamic_actions: bool = False
+
+    # Every ModuleBase subclass, in definition order
+    _REGISTRY: List[type] = []
+
+    # Lowercased class name, set per subclass at class creation
+    _module_id: str = ""
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._module_id = cls.__name__.lower()
+        ModuleBase._REGISTRY.append(cls)
+
+    # Populated by discover_modules(): id, name, description, icon, color
+    # and (unless dynamic_actions) actions as JSON, minus the leading "{"
+    _static_json: bytes = b""
+
+    # name and description may be overridden with plain class attributes
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -22,15 +61,14 @@ class ModuleBase(ABC):
         """Module description"""
         pass
 
-    @property
-    def icon(self) -> str:
-        """Module icon (emoji or icon class)"""
-        return "⚙️"
+    # Module icon (emoji or icon class)
+    icon: str = "⚙️"
 
-    @property
-    def color(self) -> str:
-        """Module color theme (hex color)"""
-        return "#6366f1"
+    # Module color theme (hex color)
+    color: str = "#6366f1"
+
+    # Actions returned by the default get_actions()
+    ACTIONS: Tuple[Dict[str, Any], ...] = ()
 
     @abstractmethod
     def get_status(self) -> Dict[str, Any]:
@@ -40,17 +78,25 @@ class ModuleBase(ABC):
         """
         pass
 
-    @abstractmethod
-    def get_actions(self) -> List[Dict[str, Any]]:
+    def get_actions(self) -> Sequence[Dict[str, Any]]:
         """
         Get available actions for this module
+        Defaults to the ACTIONS class constant
         Returns: List of action definitions with:
             - id: unique action identifier
             - label: button label
             - type: 'button', 'input', 'toggle', etc.
             - variant: 'primary', 'danger', 'success', etc.
         """
-        pass
+        return self.ACTIONS
+
+    def get_actions_json(self) -> Optional[bytes]:
+        """
+        Optional pre-serialized JSON array of get_actions()
+        Modules may return cached bytes here to skip encoding the actions on
+        every request. Returns None to fall back to get_actions().
+        """
+        return None
 
     @abstractmethod
     def execute_action(self, action_id: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -66,14 +112,10 @@ class ModuleBase(ABC):
         """
         pass
 
-    def get_module_data(self) -> Dict[str, Any]:
-        """Get complete module data for frontend"""
-        return {
-            "id": self.__class__.__name__.lower(),
-            "name": self.name,
-            "description": self.description,
-            "icon": self.icon,
-            "color": self.color,
-            "status": self.get_status(),
-            "actions": self.get_actions()
-        }
+    async def execute_action_async(self, action_id: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Execute a module action from the web app's event loop
+        Runs execute_action in a worker thread by default so blocking modules
+        don't stall other requests. Override for natively async actions.
+        """
+        return await asyncio.to_thread(self.execute_action, action_id, params)
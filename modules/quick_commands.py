@@ -8,33 +8,81 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
 
 from module_base import ModuleBase
+import asyncio
+import orjson
 import subprocess
+import time
 from datetime import datetime
 
+COMMAND_TIMEOUT = 10
+
+# action_id -> (argv candidates tried in order, description, max output lines)
+# Commands run without a shell; a later candidate is used when an earlier
+# one is missing or fails
+COMMANDS = {
+    "check_disk": ((("df", "-h", "/"),), "Disk space", None),
+    "list_processes": ((("ps", "aux"),), "Top processes", 10),
+    "network_info": ((("ifconfig",), ("ip", "addr")), "Network info", None),
+    "date_time": ((("date",),), "Current date/time", None),
+}
+
+# Seconds a command's output is reused before the command is run again
+CACHE_TTL = {
+    "check_disk": 5,
+    "list_processes": 1,
+    "network_info": 10,
+    "date_time": 1,
+}
+
 
 class QuickCommandsModule(ModuleBase):
     """Module for executing quick commands"""
 
+    name = "Quick Commands"
+    description = "Execute common server commands with a single click"
+    icon = "⚙️"
+    color = "#f59e0b"
+
+    ACTIONS = (
+        {
+            "id": "check_disk",
+            "label": "💾 Check Disk Space",
+            "variant": "primary"
+        },
+        {
+            "id": "list_processes",
+            "label": "📋 List Top Processes",
+            "variant": "primary"
+        },
+        {
+            "id": "network_info",
+            "label": "🌐 Network Info",
+            "variant": "primary"
+        },
+        {
+            "id": "date_time",
+            "label": "🕐 Show Date/Time",
+            "variant": "secondary"
+        },
+    )
+    ACTIONS_JSON = orjson.dumps(ACTIONS)
+
     def __init__(self):
         self.last_command = None
         self.last_execution = None
         self.execution_count = 0
-
-    @property
-    def name(self) -> str:
-        return "Quick Commands"
-
-    @property
-    def description(self) -> str:
-        return "Execute common server commands with a single click"
-
-    @property
-    def icon(self) -> str:
-        return "⚙️"
-
-    @property
-    def color(self) -> str:
-        return "#f59e0b"
+        self._output_cache = {}  # {action_id: (monotonic timestamp, result)}
+
+        # One result dict per command, refilled in place by the async path.
+        # Each command has its own lock so its slot is never refilled while
+        # another request still holds it, without a slow command holding up
+        # the others; locks are created on first use so they bind to the
+        # server's event loop
+        self._result_slots = {
+            action_id: {"success": True, "message": "", "data": {"output": "", "return_code": 0}}
+            for action_id in COMMANDS
+        }
+        self._exec_locks = {}  # {action_id: asyncio.Lock}
 
     def get_status(self):
         """Get current status"""
@@ -50,81 +98,153 @@ class QuickCommandsModule(ModuleBase):
 
         return status
 
-    def get_actions(self):
-        """Get available actions"""
-        return [
-            {
-                "id": "check_disk",
-                "label": "💾 Check Disk Space",
-                "variant": "primary"
-            },
-            {
-                "id": "list_processes",
-                "label": "📋 List Top Processes",
-                "variant": "primary"
-            },
-            {
-                "id": "network_info",
-                "label": "🌐 Network Info",
-                "variant": "primary"
-            },
-            {
-                "id": "date_time",
-                "label": "🕐 Show Date/Time",
-                "variant": "secondary"
-            }
-        ]
+    def get_actions_json(self):
+        """Actions pre-encoded at import"""
+        return self.ACTIONS_JSON
 
     def execute_action(self, action_id: str, params=None):
         """Execute action"""
-        commands = {
-            "check_disk": ("df -h /", "Disk space"),
-            "list_processes": ("ps aux | head -10", "Top processes"),
-            "network_info": ("ifconfig 2>/dev/null || ip addr 2>/dev/null || echo 'Network info unavailable'", "Network info"),
-            "date_time": ("date", "Current date/time")
-        }
-
-        if action_id not in commands:
+        if action_id not in COMMANDS:
             return {
                 "success": False,
                 "error": f"Unknown action: {action_id}"
             }
 
-        command, description = commands[action_id]
+        cached = self._cached_result(action_id)
+        if cached is not None:
+            return cached
+
+        candidates, description, max_lines = COMMANDS[action_id]
 
         try:
-            # Execute command
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-
-            self.last_command = description
-            self.last_execution = datetime.now()
-            self.execution_count += 1
-
-            output = result.stdout.strip() if result.stdout else result.stderr.strip()
-            output_preview = output[:200] + "..." if len(output) > 200 else output
+            for argv in candidates:
+                try:
+                    result = subprocess.run(
+                        argv,
+                        capture_output=True,
+                        text=True,
+                        timeout=COMMAND_TIMEOUT
+                    )
+                except FileNotFoundError:
+                    continue
+
+                if result.returncode == 0 or argv is candidates[-1]:
+                    return self._command_result(action_id, description, max_lines, result.stdout, result.stderr, result.returncode)
+
+            return self._command_result(action_id, description, max_lines, "", f"{description} unavailable", 127)
 
+        except subprocess.TimeoutExpired:
             return {
-                "success": True,
-                "message": f"{description} executed successfully",
-                "data": {
-                    "output": output_preview,
-                    "return_code": result.returncode
-                }
+                "success": False,
+                "error": f"Command timed out after {COMMAND_TIMEOUT} seconds"
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Failed to execute command: {str(e)}"
             }
 
-        except subprocess.TimeoutExpired:
+    async def execute_action_async(self, action_id: str, params=None):
+        """Execute action without blocking the event loop"""
+        if action_id not in COMMANDS:
             return {
                 "success": False,
-                "error": "Command timed out after 10 seconds"
+                "error": f"Unknown action: {action_id}"
             }
+
+        cached = self._cached_result(action_id)
+        if cached is not None:
+            return cached
+
+        lock = self._exec_locks.get(action_id)
+        if lock is None:
+            lock = self._exec_locks[action_id] = asyncio.Lock()
+
+        async with lock:
+            # Another request may have refreshed the output while we waited
+            cached = self._cached_result(action_id)
+            if cached is not None:
+                return cached
+            return await self._run_command_async(action_id)
+
+    async def _run_command_async(self, action_id):
+        """Run a command with asyncio subprocesses, filling its result slot"""
+        candidates, description, max_lines = COMMANDS[action_id]
+        slot = self._result_slots[action_id]
+
+        try:
+            for argv in candidates:
+                try:
+                    proc = await asyncio.create_subprocess_exec(
+                        *argv,
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.PIPE
+                    )
+                except FileNotFoundError:
+                    continue
+
+                try:
+                    stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=COMMAND_TIMEOUT)
+                except asyncio.TimeoutError:
+                    proc.kill()
+                    await proc.wait()
+                    return {
+                        "success": False,
+                        "error": f"Command timed out after {COMMAND_TIMEOUT} seconds"
+                    }
+
+                if proc.returncode == 0 or argv is candidates[-1]:
+                    return self._command_result(
+                        action_id,
+                        description,
+                        max_lines,
+                        stdout.decode(errors="replace"),
+                        stderr.decode(errors="replace"),
+                        proc.returncode,
+                        slot
+                    )
+
+            return self._command_result(action_id, description, max_lines, "", f"{description} unavailable", 127, slot)
+
         except Exception as e:
             return {
                 "success": False,
                 "error": f"Failed to execute command: {str(e)}"
             }
+
+    def _cached_result(self, action_id):
+        """Return the last result for action_id if it is still fresh"""
+        timestamp, result = self._output_cache.get(action_id, (0.0, None))
+        if result is not None and time.monotonic() - timestamp < CACHE_TTL.get(action_id, 0):
+            return result
+        return None
+
+    def _command_result(self, action_id, description, max_lines, stdout, stderr, return_code, slot=None):
+        """Record the execution, cache and build the action response
+        Fills slot in place when given instead of allocating a new dict"""
+        self.last_command = description
+        self.last_execution = datetime.now()
+        self.execution_count += 1
+
+        output = stdout.strip() if stdout else stderr.strip()
+        if max_lines:
+            output = "\n".join(output.splitlines()[:max_lines])
+        output_preview = output[:200] + "..." if len(output) > 200 else output
+
+        message = f"{description} executed successfully"
+        if slot is not None:
+            result = slot
+            result["message"] = message
+            result["data"]["output"] = output_preview
+            result["data"]["return_code"] = return_code
+        else:
+            result = {
+                "success": True,
+                "message": message,
+                "data": {
+                    "output": output_preview,
+                    "return_code": return_code
+                }
+            }
+        self._output_cache[action_id] = (time.monotonic(), result)
+        return result
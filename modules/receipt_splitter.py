@@ -5,32 +5,133 @@ Uploads receipt images, parses them with AI, and creates split Splitwise expense
 
 import sys
 import os
-from pathlib import Path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
 
-from module_base import ModuleBase
-from splitwise import Splitwise
-from splitwise.expense import Expense
-from splitwise.user import ExpenseUser
-import tomli
+from module_base import ModuleBase, load_config
+import asyncio
 import base64
-import json
-import requests
-from typing import Dict, Any, List
+import io
+import orjson
+from functools import cached_property
+from PIL import Image, ImageChops, ImageDraw, ImageFont, ImageOps
+from typing import TYPE_CHECKING, Dict, Any, List, Tuple
 import secrets
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+# splitwise, httpx and imagehash are imported on first use so an idle module
+# doesn't slow down startup
+if TYPE_CHECKING:
+    from splitwise.user import ExpenseUser
+
+# Prefix of the data URLs sent to OpenRouter
+_DATA_URL_PREFIX = b"data:image/jpeg;base64,"
+
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+# Transient OpenRouter failures are retried this many times, waiting
+# RETRY_BACKOFF * 2**attempt seconds in between, instead of making the
+# user reprocess the receipt
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+MAX_RETRIES = 2
+RETRY_BACKOFF = 0.3
 
 
 class ReceiptSplitterModule(ModuleBase):
     """Module to split receipts among Splitwise group members"""
 
-    # Class-level storage for processing sessions
-    sessions: Dict[str, Dict[str, Any]] = {}
+    name = "Receipt Splitter"
+    description = "Upload receipt images, AI parses items, and split costs among group members."
+    icon = "🧾"
+    color = "#8b5cf6"  # purple
+
+    ACTIONS = (
+        {
+            "id": "fetch_groups",
+            "label": "🔄 Load Groups",
+            "variant": "secondary"
+        },
+        {
+            "id": "process_receipt",
+            "label": "🚀 Process Receipt",
+            "variant": "primary"
+        },
+    )
+
+    # Class-level storage for processing sessions, least recently used first
+    sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    # process_receipt runs on the event loop and other actions in worker
+    # threads, so every access to sessions holds this lock
+    _sessions_lock = threading.Lock()
+    # Seconds before an unfinished processing session is discarded
+    SESSION_TTL = 30 * 60
+    # Sessions kept at most; the least recently used is dropped beyond this
+    MAX_SESSIONS = 32
+    # Seconds a group's member list fetched alongside receipt parsing is
+    # served to fetch_group_users
+    GROUP_USERS_TTL = 5 * 60
+
+    # Receipt images are downscaled to this longest edge and re-encoded as
+    # JPEG at this quality before upload to keep request size and tokens down
+    MAX_EDGE = 1600
+    JPEG_Q = 75
+    # OpenRouter image detail hint ("low", "high" or "auto"); "low" shrinks
+    # a receipt page to about 512px, past legibility
+    IMAGE_DETAIL = "high"
+    # Height of the "Page i/N" band above each page in a spliced image
+    PAGE_LABEL_HEIGHT = 48
+    # Longest edge of a spliced image, room for two full-size pages;
+    # further pages start another image
+    MAX_SPLICE_EDGE = 2 * (MAX_EDGE + PAGE_LABEL_HEIGHT)
+    # A page is only dropped as a repeat of an earlier one when their
+    # 256-bit perceptual hashes differ by at most DUPLICATE_HASH_DISTANCE
+    # bits and no pixel of their DUPLICATE_COMPARE_WIDTH-wide grayscale
+    # thumbnails differs by more than DUPLICATE_PIXEL_DIFF. Receipts with
+    # the same layout hash almost alike, so the pixel check is what keeps
+    # pages differing in a single price; re-encodes of one shot pass it
+    DUPLICATE_HASH_SIZE = 16
+    DUPLICATE_HASH_DISTANCE = 6
+    DUPLICATE_COMPARE_WIDTH = 128
+    DUPLICATE_PIXEL_DIFF = 48
+
+    # Static part of the parsing request; only the image varies per call
+    _PROMPT_TEXT = """Analyze this receipt or purchase order image and extract ALL items with their costs.
+Multiple pages may be concatenated top-to-bottom, each below a "Page i/N" label, and may continue in further images.
+List every item with its name and its price as a number, combining all pages into one list.
+If multiple pages show the same receipt, don't duplicate items."""
+    _BASE_CONTENT = [{"type": "text", "text": _PROMPT_TEXT}]
+    # Structured output schema, so prices come back as numbers
+    _RESPONSE_FORMAT = {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "receipt",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "items": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "name": {"type": "string"},
+                                "price": {"type": "number"}
+                            },
+                            "required": ["name", "price"],
+                            "additionalProperties": False
+                        }
+                    }
+                },
+                "required": ["items"],
+                "additionalProperties": False
+            }
+        }
+    }
 
     def __init__(self):
-        # Load configuration from config.toml
-        config_path = Path(__file__).parent.parent / 'config.toml'
-        with open(config_path, 'rb') as f:
-            config = tomli.load(f)
+        # Configuration from config.toml, parsed once per process
+        config = load_config()
 
         splitwise_config = config.get('splitwise', {})
         openrouter_config = config.get('openrouter', {})
@@ -43,21 +144,19 @@ class ReceiptSplitterModule(ModuleBase):
         # OpenRouter credentials
         self.OPENROUTER_API_KEY = openrouter_config.get('api_key')
 
-    @property
-    def name(self) -> str:
-        return "Receipt Splitter"
+        # HTTP/2 client for OpenRouter and the event loop it belongs to;
+        # created on first use by _openrouter_client()
+        self._httpx = None
+        self._httpx_loop = None
 
-    @property
-    def description(self) -> str:
-        return "Upload receipt images, AI parses items, and split costs among group members."
+        # {group_id: (monotonic timestamp, fetch_group_users result)}
+        self._group_users = {}
 
-    @property
-    def icon(self) -> str:
-        return "🧾"
-
-    @property
-    def color(self) -> str:
-        return "#8b5cf6"  # purple
+    @cached_property
+    def _sObj(self):
+        """Shared Splitwise client, created on first use"""
+        from splitwise import Splitwise
+        return Splitwise(self.CONSUMER_KEY, self.CONSUMER_SECRET, api_key=self.API_KEY)
 
     def get_status(self):
         """Return current module info and frontend elements."""
@@ -85,27 +184,14 @@ class ReceiptSplitterModule(ModuleBase):
             ]
         }
 
-    def get_actions(self):
-        """Return backend actions supported by this module."""
-        return [
-            {
-                "id": "fetch_groups",
-                "label": "🔄 Load Groups",
-                "variant": "secondary"
-            },
-            {
-                "id": "process_receipt",
-                "label": "🚀 Process Receipt",
-                "variant": "primary"
-            }
-        ]
-
     def execute_action(self, action_id: str, params=None):
         """Handle frontend action calls."""
+        self._prune_sessions()
+
         if action_id == "fetch_groups":
             return self._fetch_groups()
         elif action_id == "process_receipt":
-            return self._process_receipt(params or {})
+            return asyncio.run(self._process_receipt_sync(params or {}))
         elif action_id == "fetch_group_users":
             return self._fetch_group_users(params or {})
         elif action_id == "create_split_expense":
@@ -113,11 +199,25 @@ class ReceiptSplitterModule(ModuleBase):
         else:
             return {"success": False, "error": f"Unknown action: {action_id}"}
 
+    async def execute_action_async(self, action_id: str, params=None):
+        """Process receipts on the event loop; other actions use a thread."""
+        if action_id == "process_receipt":
+            self._prune_sessions()
+            return await self._process_receipt(params or {})
+        return await super().execute_action_async(action_id, params)
+
+    def _prune_sessions(self):
+        """Drop processing sessions older than SESSION_TTL."""
+        cutoff = time.monotonic() - self.SESSION_TTL
+        with self._sessions_lock:
+            expired = [token for token, data in self.sessions.items() if data["created"] < cutoff]
+            for token in expired:
+                del self.sessions[token]
+
     def _fetch_groups(self):
         """Fetch all Splitwise groups for the user."""
         try:
-            sObj = Splitwise(self.CONSUMER_KEY, self.CONSUMER_SECRET, api_key=self.API_KEY)
-            groups = sObj.getGroups()
+            groups = self._sObj.getGroups()
 
             group_list = []
             for group in groups:
@@ -135,7 +235,17 @@ class ReceiptSplitterModule(ModuleBase):
         except Exception as e:
             return {"success": False, "error": f"Failed to fetch groups: {str(e)}"}
 
-    def _process_receipt(self, params: Dict[str, Any]):
+    async def _process_receipt_sync(self, params: Dict[str, Any]):
+        """Run _process_receipt on a private event loop (see execute_action)."""
+        try:
+            return await self._process_receipt(params)
+        finally:
+            # The client can't outlive the loop asyncio.run() is about to close
+            if self._httpx is not None and self._httpx_loop is asyncio.get_running_loop():
+                await self._httpx.aclose()
+                self._httpx = self._httpx_loop = None
+
+    async def _process_receipt(self, params: Dict[str, Any]):
         """Process uploaded receipt images with OpenRouter AI."""
         group_id = params.get("group_id", "").strip()
         images_data = params.get("images", [])
@@ -150,8 +260,22 @@ class ReceiptSplitterModule(ModuleBase):
             return {"success": False, "error": "Maximum 10 images allowed"}
 
         try:
+            group_key = int(group_id)
+        except ValueError:
+            return {"success": False, "error": "Invalid Splitwise group"}
+
+        # The split page asks for the group's members next; fetch them from
+        # Splitwise while OpenRouter parses the receipt. This only warms
+        # _group_users (fetch_group_users retries and reports failures) and
+        # is never awaited: the splitwise SDK sets no timeout, so a stalled
+        # call must not hold up the parsed receipt
+        threading.Thread(target=self._load_group_users, args=(group_key,), daemon=True).start()
+
+        try:
+            pages, duplicates = await asyncio.to_thread(self._preprocess_pages, images_data)
+
             # Parse receipt items using OpenRouter
-            items = self._parse_receipt_with_ai(images_data)
+            items = await self._parse_receipt_with_ai(pages)
 
             if not items:
                 return {"success": False, "error": "No items found on receipt"}
@@ -160,89 +284,212 @@ class ReceiptSplitterModule(ModuleBase):
             session_token = secrets.token_urlsafe(32)
 
             # Store session data
-            self.sessions[session_token] = {
-                "group_id": group_id,
-                "items": items,
-                "images": images_data
-            }
+            with self._sessions_lock:
+                self.sessions[session_token] = {
+                    "group_id": group_id,
+                    "items": items,
+                    "created": time.monotonic()
+                }
+                while len(self.sessions) > self.MAX_SESSIONS:
+                    self.sessions.popitem(last=False)
+
+            message = f"Found {len(items)} items on receipt"
+            if duplicates:
+                message += f" (skipped {duplicates} duplicate page{'s' if duplicates > 1 else ''})"
 
             return {
                 "success": True,
-                "message": f"Found {len(items)} items on receipt",
+                "message": message,
                 "session_token": session_token,
                 "items": items,
-                "group_id": group_id
+                "group_id": group_id,
+                "duplicate_pages": duplicates
             }
 
         except Exception as e:
             return {"success": False, "error": f"Failed to process receipt: {str(e)}"}
 
-    def _parse_receipt_with_ai(self, images_data: List[str]) -> Dict[str, float]:
-        """Send images to OpenRouter for parsing with structured outputs."""
+    async def _parse_receipt_with_ai(self, pages: List[Image.Image]) -> Dict[str, float]:
+        """Send preprocessed pages to OpenRouter for parsing with structured outputs."""
+        image_urls = await asyncio.to_thread(self._image_data_urls, pages)
 
-        # Prepare image messages for the API
-        image_content = []
-        for img_data in images_data:
-            # img_data should be base64 encoded
-            image_content.append({
+        image_content = [
+            {
                 "type": "image_url",
                 "image_url": {
-                    "url": f"data:image/jpeg;base64,{img_data}"
+                    "url": image_url,
+                    "detail": self.IMAGE_DETAIL
                 }
-            })
+            }
+            for image_url in image_urls
+        ]
 
-        # Add text prompt
         messages = [
             {
                 "role": "user",
-                "content": [
-                    {
-                        "type": "text",
-                        "text": """Analyze these receipt or purchase order images and extract ALL items with their costs.
-Return a JSON object where each key is the item name and the value is the price as a number.
-Combine all items from all images into one object.
-If multiple images show the same receipt, don't duplicate items.
-Example format: {"Milk": 4.99, "Bread": 3.50, "Eggs": 5.99}"""
-                    }
-                ] + image_content
+                "content": self._BASE_CONTENT + image_content
             }
         ]
 
         # Call OpenRouter API with structured outputs
-        response = requests.post(
-            url="https://openrouter.ai/api/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {self.OPENROUTER_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "google/gemini-2.0-flash-001:free",  # Free vision model
-                "messages": messages,
-                "response_format": {
-                    "type": "json_object"
-                }
-            }
-        )
+        # Encoded with orjson; the client already sends Content-Type: application/json
+        body = orjson.dumps({
+            "model": "google/gemini-2.0-flash-001:free",  # Free vision model
+            "messages": messages,
+            "response_format": self._RESPONSE_FORMAT
+        })
+        response = await self._post_openrouter(body)
 
         if response.status_code != 200:
             raise Exception(f"OpenRouter API error: {response.status_code} - {response.text}")
 
-        result = response.json()
+        result = orjson.loads(response.content)
 
         # Extract the items from the response
-        content = result.get("choices", [{}])[0].get("message", {}).get("content", "{}")
-        items_dict = json.loads(content)
+        content = result.get("choices", [{}])[0].get("message", {}).get("content", '{"items": []}')
+
+        # Repeated lines (e.g. two of the same item) are summed
+        items_dict = defaultdict(float)
+        for item in orjson.loads(content)["items"]:
+            items_dict[item["name"]] += item["price"]
+
+        return {name: round(price, 2) for name, price in items_dict.items()}
+
+    def _openrouter_client(self):
+        """HTTP/2 client for OpenRouter bound to the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._httpx is None or self._httpx_loop is not loop:
+            import httpx
+
+            self._httpx = httpx.AsyncClient(
+                http2=True,
+                timeout=60.0,
+                headers={
+                    "Authorization": f"Bearer {self.OPENROUTER_API_KEY}",
+                    "Content-Type": "application/json"
+                }
+            )
+            self._httpx_loop = loop
+        return self._httpx
+
+    async def _post_openrouter(self, body: bytes):
+        """POST to OpenRouter, retrying connection errors and RETRY_STATUSES."""
+        import httpx
 
-        # Ensure all values are floats
-        parsed_items = {}
-        for item_name, price in items_dict.items():
+        client = self._openrouter_client()
+        for attempt in range(MAX_RETRIES + 1):
             try:
-                parsed_items[item_name] = float(price)
-            except (ValueError, TypeError):
-                # Skip items with invalid prices
-                continue
+                response = await client.post(OPENROUTER_URL, content=body)
+            except httpx.TransportError:
+                if attempt == MAX_RETRIES:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                    return response
+            await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+    def _preprocess_pages(self, images_data: List[str]) -> Tuple[List[Image.Image], int]:
+        """Decode and shrink the uploads in parallel, dropping repeat shots
+        of the same page; Pillow releases the GIL while decoding and resizing.
+
+        Returns the pages to send and the number of duplicates dropped.
+        """
+        with ThreadPoolExecutor(max_workers=min(10, len(images_data))) as executor:
+            pages = list(executor.map(self._preprocess_image, images_data))
+            if len(pages) == 1:
+                return pages, 0
+
+            import imagehash
+            hashes = list(executor.map(
+                lambda page: imagehash.phash(page, hash_size=self.DUPLICATE_HASH_SIZE), pages
+            ))
+
+        unique = []  # [(page, hash)]
+        for page, page_hash in zip(pages, hashes):
+            if not any(
+                page_hash - kept_hash <= self.DUPLICATE_HASH_DISTANCE and self._same_pixels(page, kept)
+                for kept, kept_hash in unique
+            ):
+                unique.append((page, page_hash))
+        return [page for page, _ in unique], len(pages) - len(unique)
+
+    def _same_pixels(self, a: Image.Image, b: Image.Image) -> bool:
+        """Whether two pages match pixel for pixel at thumbnail scale."""
+        width = self.DUPLICATE_COMPARE_WIDTH
+        size = (width, max(1, round(a.height * width / a.width)))
+        thumb_a = a.convert("L").resize(size, Image.BOX)
+        thumb_b = b.convert("L").resize(size, Image.BOX)
+        return ImageChops.difference(thumb_a, thumb_b).getextrema()[1] <= self.DUPLICATE_PIXEL_DIFF
+
+    def _image_data_urls(self, pages: List[Image.Image]) -> List[str]:
+        """Encode the pages as JPEG data URLs, splicing them into as few
+        images as MAX_SPLICE_EDGE allows."""
+        # Fewer images is better, since some providers only read the first
+        # image of a multi-image request
+        images = pages if len(pages) == 1 else self._splice_pages(pages)
+        return [(_DATA_URL_PREFIX + self._encode_jpeg(image)).decode("ascii") for image in images]
+
+    def _preprocess_image(self, b64_in: str) -> Image.Image:
+        """Decode a base64 upload into an upright RGB image within MAX_EDGE."""
+        img = Image.open(io.BytesIO(base64.b64decode(b64_in)))
+        # Phone cameras store rotation in EXIF, which re-encoding drops
+        img = ImageOps.exif_transpose(img)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        img.thumbnail((self.MAX_EDGE, self.MAX_EDGE), Image.LANCZOS)
+        return img
+
+    def _splice_pages(self, pages: List[Image.Image]) -> List[Image.Image]:
+        """Stack pages top-to-bottom at a common width with numbered labels,
+        starting a new image whenever one would exceed MAX_SPLICE_EDGE."""
+        width = min(page.width for page in pages)
+        scaled = [
+            page if page.width == width
+            else page.resize((width, round(page.height * width / page.width)), Image.LANCZOS)
+            for page in pages
+        ]
 
-        return parsed_items
+        # Group consecutive pages; a page is at most MAX_EDGE tall, so each
+        # group holds at least one page
+        label_height = self.PAGE_LABEL_HEIGHT
+        groups = [[]]
+        group_height = 0
+        for page in scaled:
+            if groups[-1] and group_height + label_height + page.height > self.MAX_SPLICE_EDGE:
+                groups.append([])
+                group_height = 0
+            groups[-1].append(page)
+            group_height += label_height + page.height
+
+        try:
+            font = ImageFont.load_default(size=label_height * 2 // 3)
+        except TypeError:  # Pillow < 10.1 has a single fixed-size default font
+            font = ImageFont.load_default()
+
+        composites = []
+        number = 0
+        for group in groups:
+            height = sum(page.height for page in group) + label_height * len(group)
+            composite = Image.new("RGB", (width, height), "white")
+            draw = ImageDraw.Draw(composite)
+
+            y = 0
+            for page in group:
+                number += 1
+                draw.text((8, y + label_height // 6), f"Page {number}/{len(scaled)}", fill="black", font=font)
+                y += label_height
+                composite.paste(page, (0, y))
+                y += page.height
+
+            composites.append(composite)
+
+        return composites
+
+    def _encode_jpeg(self, img: Image.Image) -> bytes:
+        """Encode an image as base64 JPEG bytes at JPEG_Q."""
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=self.JPEG_Q, optimize=True)
+        return base64.b64encode(buf.getbuffer())
 
     def _fetch_group_users(self, params: Dict[str, Any]):
         """Fetch all users in the selected group."""
@@ -252,37 +499,61 @@ Example format: {"Milk": 4.99, "Bread": 3.50, "Eggs": 5.99}"""
             return {"success": False, "error": "Group ID is required"}
 
         try:
-            sObj = Splitwise(self.CONSUMER_KEY, self.CONSUMER_SECRET, api_key=self.API_KEY)
-            group = sObj.getGroup(id=int(group_id))
-
-            users_list = []
-            for member in group.getMembers():
-                users_list.append({
-                    "id": member.getId(),
-                    "first_name": member.getFirstName(),
-                    "last_name": member.getLastName() or "",
-                    "name": f"{member.getFirstName()} {member.getLastName() or ''}".strip()
-                })
+            group_key = int(group_id)
+        except ValueError:
+            return {"success": False, "error": "Invalid Splitwise group"}
 
-            return {
+        # Usually prefetched while the receipt was being parsed
+        fetched, result = self._group_users.get(group_key, (0.0, None))
+        if result is not None and time.monotonic() - fetched < self.GROUP_USERS_TTL:
+            return result
+
+        return self._load_group_users(group_key)
+
+    def _load_group_users(self, group_id: int) -> Dict[str, Any]:
+        """Fetch a group's members from Splitwise and cache the result."""
+        try:
+            group = self._sObj.getGroup(id=group_id)
+
+            users_list = [self._member_row(member) for member in group.getMembers()]
+
+            result = {
                 "success": True,
                 "users": users_list,
                 "message": f"Found {len(users_list)} users in group"
             }
+            self._group_users[group_id] = (time.monotonic(), result)
+            return result
 
         except Exception as e:
             return {"success": False, "error": f"Failed to fetch group users: {str(e)}"}
 
+    @staticmethod
+    def _member_row(member) -> Dict[str, Any]:
+        """Frontend row for a Splitwise group member."""
+        first_name = member.getFirstName()
+        last_name = member.getLastName() or ""
+        return {
+            "id": member.getId(),
+            "first_name": first_name,
+            "last_name": last_name,
+            "name": f"{first_name} {last_name}".strip()
+        }
+
     def _create_split_expense(self, params: Dict[str, Any]):
         """Create a Splitwise expense with the calculated splits."""
         session_token = params.get("session_token", "").strip()
         item_splits = params.get("item_splits", {})  # {item_name: [user_ids]}
         expense_description = params.get("description", "Receipt Split")
 
-        if not session_token or session_token not in self.sessions:
+        with self._sessions_lock:
+            session_data = self.sessions.get(session_token) if session_token else None
+            if session_data is not None:
+                self.sessions.move_to_end(session_token)
+
+        if session_data is None:
             return {"success": False, "error": "Invalid or expired session"}
 
-        session_data = self.sessions[session_token]
         group_id = session_data["group_id"]
         items = session_data["items"]
 
@@ -290,69 +561,57 @@ Example format: {"Milk": 4.99, "Bread": 3.50, "Eggs": 5.99}"""
             return {"success": False, "error": "No item splits provided"}
 
         try:
-            sObj = Splitwise(self.CONSUMER_KEY, self.CONSUMER_SECRET, api_key=self.API_KEY)
-            current_user = sObj.getCurrentUser()
+            from splitwise.expense import Expense
+
+            current_user = self._sObj.getCurrentUser()
             current_user_id = current_user.getId()
 
-            # Calculate how much each person owes
-            user_totals = {}  # {user_id: total_amount}
+            # Calculate how much each person owes, in integer cents so the
+            # shares add up exactly
+            user_totals = defaultdict(int)  # {user_id: total_cents}
 
             for item_name, participant_ids in item_splits.items():
                 if item_name not in items:
                     continue
 
-                item_price = items[item_name]
                 num_participants = len(participant_ids)
 
                 if num_participants == 0:
                     continue
 
-                # Split the item cost equally among participants
-                split_amount = item_price / num_participants
+                # Split the item cost equally; the leftover cents go to the
+                # first participants so nothing is lost to rounding
+                share, remainder = divmod(round(items[item_name] * 100), num_participants)
 
-                for user_id in participant_ids:
-                    user_id_int = int(user_id)
-                    user_totals[user_id_int] = user_totals.get(user_id_int, 0.0) + split_amount
+                for index, user_id in enumerate(participant_ids):
+                    user_totals[int(user_id)] += share + (1 if index < remainder else 0)
 
             # Calculate total cost
-            total_cost = sum(items.values())
+            total_cents = sum(round(price * 100) for price in items.values())
 
             # Create the expense
             expense = Expense()
             expense.setGroupId(int(group_id))
             expense.setDescription(expense_description)
-            expense.setCost(f"{total_cost:.2f}")
-
-            # Build users list
-            users = []
-
-            # Current user pays the full amount
-            payer = ExpenseUser()
-            payer.setId(current_user_id)
-            payer.setPaidShare(f"{total_cost:.2f}")
-            payer.setOwedShare(f"{user_totals.get(current_user_id, 0.0):.2f}")
-            users.append(payer)
-
-            # Add all other users
-            for user_id, owed_amount in user_totals.items():
-                if user_id == current_user_id:
-                    continue  # Already added as payer
-
-                user = ExpenseUser()
-                user.setId(user_id)
-                user.setPaidShare("0.00")
-                user.setOwedShare(f"{owed_amount:.2f}")
-                users.append(user)
-
+            expense.setCost(self._format_cents(total_cents))
+
+            # Current user pays the full amount, everyone else only owes
+            users = [self._make_user(current_user_id, total_cents, user_totals.get(current_user_id, 0))]
+            users += [
+                self._make_user(user_id, 0, owed_cents)
+                for user_id, owed_cents in user_totals.items()
+                if user_id != current_user_id
+            ]
             expense.setUsers(users)
 
             # Create the expense on Splitwise
-            expense, errors = sObj.createExpense(expense)
+            expense, errors = self._sObj.createExpense(expense)
             if errors:
                 return {"success": False, "error": str(errors.getErrors())}
 
-            # Clean up session
-            del self.sessions[session_token]
+            # Clean up session; it may already have been pruned meanwhile
+            with self._sessions_lock:
+                self.sessions.pop(session_token, None)
 
             return {
                 "success": True,
@@ -362,3 +621,21 @@ Example format: {"Milk": 4.99, "Bread": 3.50, "Eggs": 5.99}"""
 
         except Exception as e:
             return {"success": False, "error": f"Failed to create expense: {str(e)}"}
+
+    @classmethod
+    def _make_user(cls, user_id: int, paid_cents: int, owed_cents: int) -> "ExpenseUser":
+        """Build an ExpenseUser from integer cent amounts."""
+        from splitwise.user import ExpenseUser
+
+        user = ExpenseUser()
+        user.setId(user_id)
+        user.setPaidShare(cls._format_cents(paid_cents))
+        user.setOwedShare(cls._format_cents(owed_cents))
+        return user
+
+    @staticmethod
+    def _format_cents(cents: int) -> str:
+        """Format a cent amount as a decimal string, e.g. 1205 -> "12.05", -5 -> "-0.05"."""
+        sign = "-" if cents < 0 else ""
+        dollars, cents = divmod(abs(cents), 100)
+        return f"{sign}{dollars}.{cents:02d}"
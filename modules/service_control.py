@@ -10,32 +10,49 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
 
 from module_base import ModuleBase
 from datetime import datetime
+import orjson
 
 
 class ServiceControlModule(ModuleBase):
     """Module to control a service (simulated)"""
 
+    name = "Service Control"
+    description = "Start, stop, and restart the demo service"
+    icon = "⚡"
+    color = "#10b981"
+
+    # Available actions depend on whether the service is running
+    dynamic_actions = True
+
+    RUNNING_ACTIONS = (
+        {
+            "id": "stop",
+            "label": "⏹️ Stop Service",
+            "variant": "danger"
+        },
+        {
+            "id": "restart",
+            "label": "🔄 Restart Service",
+            "variant": "warning"
+        },
+    )
+
+    STOPPED_ACTIONS = (
+        {
+            "id": "start",
+            "label": "▶️ Start Service",
+            "variant": "success"
+        },
+    )
+
+    RUNNING_ACTIONS_JSON = orjson.dumps(RUNNING_ACTIONS)
+    STOPPED_ACTIONS_JSON = orjson.dumps(STOPPED_ACTIONS)
+
     def __init__(self):
         self.is_running = False
         self.start_time = None
         self.restart_count = 0
 
-    @property
-    def name(self) -> str:
-        return "Service Control"
-
-    @property
-    def description(self) -> str:
-        return "Start, stop, and restart the demo service"
-
-    @property
-    def icon(self) -> str:
-        return "⚡"
-
-    @property
-    def color(self) -> str:
-        return "#10b981"
-
     def get_status(self):
         """Get current service status"""
         status = {
@@ -45,33 +62,17 @@ class ServiceControlModule(ModuleBase):
 
         if self.is_running and self.start_time:
             uptime = datetime.now() - self.start_time
-            status["uptime"] = self._format_uptime(uptime)
+            status["uptime"] = self._format_uptime(int(uptime.total_seconds()))
 
         return status
 
     def get_actions(self):
         """Get available actions"""
-        if self.is_running:
-            return [
-                {
-                    "id": "stop",
-                    "label": "⏹️ Stop Service",
-                    "variant": "danger"
-                },
-                {
-                    "id": "restart",
-                    "label": "🔄 Restart Service",
-                    "variant": "warning"
-                }
-            ]
-        else:
-            return [
-                {
-                    "id": "start",
-                    "label": "▶️ Start Service",
-                    "variant": "success"
-                }
-            ]
+        return self.RUNNING_ACTIONS if self.is_running else self.STOPPED_ACTIONS
+
+    def get_actions_json(self):
+        """Pre-encoded actions for the current state"""
+        return self.RUNNING_ACTIONS_JSON if self.is_running else self.STOPPED_ACTIONS_JSON
 
     def execute_action(self, action_id: str, params=None):
         """Execute action"""
@@ -120,20 +121,12 @@ class ServiceControlModule(ModuleBase):
         }
 
     @staticmethod
-    def _format_uptime(uptime):
-        """Format uptime timedelta to readable string"""
-        days = uptime.days
-        hours, remainder = divmod(uptime.seconds, 3600)
-        minutes, seconds = divmod(remainder, 60)
-
-        parts = []
-        if days > 0:
-            parts.append(f"{days}d")
-        if hours > 0:
-            parts.append(f"{hours}h")
-        if minutes > 0:
-            parts.append(f"{minutes}m")
-        if seconds > 0 and not parts:
-            parts.append(f"{seconds}s")
-
-        return " ".join(parts) if parts else "< 1s"
+    def _format_uptime(total_seconds: int) -> str:
+        """Format whole seconds of uptime; seconds only show under a minute"""
+        days, rest = divmod(total_seconds, 86400)
+        hours, rest = divmod(rest, 3600)
+        minutes, seconds = divmod(rest, 60)
+        text = (f"{days}d " if days else "") + (f"{hours}h " if hours else "") + (f"{minutes}m" if minutes else "")
+        if text:
+            return text.rstrip()
+        return f"{seconds}s" if seconds else "< 1s"
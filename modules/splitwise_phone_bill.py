@@ -5,24 +5,31 @@ Creates a new Splitwise expense titled "Phone Bill Due <date>"
 
 import sys
 import os
-from pathlib import Path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
 
-from module_base import ModuleBase
-from splitwise import Splitwise
-from splitwise.expense import Expense
-from splitwise.user import ExpenseUser
-import tomli
+from module_base import ModuleBase, load_config
+from functools import cached_property
 
 
 class SplitwisePhoneBillModule(ModuleBase):
     """Module to create a Phone Bill expense in Splitwise"""
 
+    name = "Splitwise: Phone Bill"
+    description = "Create a new Splitwise expense for the monthly phone bill."
+    icon = "📱"
+    color = "#22c55e"  # green
+
+    ACTIONS = (
+        {
+            "id": "create_expense",
+            "label": "Create Splitwise Expense",
+            "variant": "primary"
+        },
+    )
+
     def __init__(self):
-        # Load configuration from config.toml
-        config_path = Path(__file__).parent.parent / 'config.toml'
-        with open(config_path, 'rb') as f:
-            config = tomli.load(f)
+        # Configuration from config.toml, parsed once per process
+        config = load_config()
 
         splitwise_config = config.get('splitwise', {})
 
@@ -30,6 +37,7 @@ class SplitwisePhoneBillModule(ModuleBase):
         self.CONSUMER_KEY = splitwise_config.get('consumer_key')
         self.CONSUMER_SECRET = splitwise_config.get('consumer_secret')
         self.API_KEY = splitwise_config.get('api_key')
+
         self.GROUP_ID = 31014911  # Phone Bill
         self.TOTAL_COST = 560.0
 
@@ -43,21 +51,11 @@ class SplitwisePhoneBillModule(ModuleBase):
             51393333: 70,  # Elle Scott
         }
 
-    @property
-    def name(self) -> str:
-        return "Splitwise: Phone Bill"
-
-    @property
-    def description(self) -> str:
-        return "Create a new Splitwise expense for the monthly phone bill."
-
-    @property
-    def icon(self) -> str:
-        return "📱"
-
-    @property
-    def color(self) -> str:
-        return "#22c55e"  # green
+    @cached_property
+    def _sObj(self):
+        """Shared Splitwise client, created on first use"""
+        from splitwise import Splitwise
+        return Splitwise(self.CONSUMER_KEY, self.CONSUMER_SECRET, api_key=self.API_KEY)
 
     def get_status(self):
         """Return current module info and frontend elements."""
@@ -81,16 +79,6 @@ class SplitwisePhoneBillModule(ModuleBase):
             ]
         }
 
-    def get_actions(self):
-        """Return backend actions supported by this module."""
-        return [
-            {
-                "id": "create_expense",
-                "label": "Create Splitwise Expense",
-                "variant": "primary"
-            }
-        ]
-
     def execute_action(self, action_id: str, params=None):
         """Handle frontend action calls."""
         if action_id != "create_expense":
@@ -101,8 +89,10 @@ class SplitwisePhoneBillModule(ModuleBase):
             return {"success": False, "error": "Please enter a Date Due value."}
 
         try:
-            sObj = Splitwise(self.CONSUMER_KEY, self.CONSUMER_SECRET, api_key=self.API_KEY)
-            current_user = sObj.getCurrentUser()
+            from splitwise.expense import Expense
+            from splitwise.user import ExpenseUser
+
+            current_user = self._sObj.getCurrentUser()
             gray_id = current_user.getId()
 
             # Build expense
@@ -130,7 +120,7 @@ class SplitwisePhoneBillModule(ModuleBase):
 
             expense.setUsers(users)
 
-            expense, errors = sObj.createExpense(expense)
+            expense, errors = self._sObj.createExpense(expense)
             if errors:
                 return {"success": False, "error": str(errors.getErrors())}
 
@@ -9,72 +9,150 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
 
 from module_base import ModuleBase
 import platform
-import psutil
-from datetime import datetime
+import threading
+import time
+
+# Optional at import so a missing psutil disables this tile instead of
+# failing module discovery
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Seconds between usage samples
+REFRESH_SEC = 2
+# The sampler stops after this many seconds without a status request and
+# restarts on the next one, so a reloaded or removed module doesn't leave
+# a thread running
+IDLE_SEC = 60
+
+
+class _Snapshot:
+    """CPU, memory, disk and uptime sampled by one background thread
+
+    Every status request reads the latest sample, so the number of
+    syscalls doesn't grow with the number of connected clients.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = None
+        self._last_read = 0.0
+        self._thread = None
+        self._boot_time = None
+
+    def read(self) -> dict:
+        """Latest sample, starting the sampler if it isn't running"""
+        with self._lock:
+            self._last_read = time.monotonic()
+            if self._thread is None:
+                if self._boot_time is None:
+                    self._boot_time = psutil.boot_time()
+                try:
+                    # Usage since the previous sample, or 0.0 on the first call
+                    self._data = self._sample(psutil.cpu_percent(interval=None))
+                except Exception as e:
+                    # Reported to the caller; the next read tries again
+                    self._data = self._error(e)
+                    return self._data
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            return self._data
+
+    def _run(self):
+        try:
+            while True:
+                try:
+                    # Blocks for REFRESH_SEC, pacing the loop
+                    data = self._sample(psutil.cpu_percent(interval=REFRESH_SEC))
+                except Exception as e:
+                    # Stop sampling; the next read restarts the sampler
+                    with self._lock:
+                        self._data = self._error(e)
+                    return
+                with self._lock:
+                    self._data = data
+                    if time.monotonic() - self._last_read > IDLE_SEC:
+                        self._thread = None
+                        return
+        finally:
+            # Always let read() start a new sampler once this one is gone
+            with self._lock:
+                if self._thread is threading.current_thread():
+                    self._thread = None
 
+    @staticmethod
+    def _error(error: Exception) -> dict:
+        return {"error": f"Failed to read system usage: {error}"}
 
-class SystemInfoModule(ModuleBase):
-    """Module to display system information"""
-
-    @property
-    def name(self) -> str:
-        return "System Information"
+    def _sample(self, cpu_percent: float) -> dict:
+        memory = psutil.virtual_memory()
+        memory_total = SystemInfoModule._bytes_to_gb(memory.total)
+        memory_used = SystemInfoModule._bytes_to_gb(memory.used)
 
-    @property
-    def description(self) -> str:
-        return "View server system information, resource usage, and uptime"
+        disk = psutil.disk_usage('/')
+        disk_total = SystemInfoModule._bytes_to_gb(disk.total)
+        disk_used = SystemInfoModule._bytes_to_gb(disk.used)
 
-    @property
-    def icon(self) -> str:
-        return "💻"
+        return {
+            "cpu_usage": f"{cpu_percent}%",
+            "memory_usage": f"{memory_used:.1f}GB / {memory_total:.1f}GB ({memory.percent}%)",
+            "disk_usage": f"{disk_used:.1f}GB / {disk_total:.1f}GB ({disk.percent}%)",
+            "uptime": SystemInfoModule._format_uptime(int(time.time() - self._boot_time))
+        }
 
-    @property
-    def color(self) -> str:
-        return "#3b82f6"
 
-    def get_status(self):
-        """Get current system information"""
-        # CPU Information
-        cpu_percent = psutil.cpu_percent(interval=1)
-        cpu_count = psutil.cpu_count()
+_snapshot = _Snapshot()
 
-        # Memory Information
-        memory = psutil.virtual_memory()
-        memory_total = self._bytes_to_gb(memory.total)
-        memory_used = self._bytes_to_gb(memory.used)
-        memory_percent = memory.percent
 
-        # Disk Information
-        disk = psutil.disk_usage('/')
-        disk_total = self._bytes_to_gb(disk.total)
-        disk_used = self._bytes_to_gb(disk.used)
-        disk_percent = disk.percent
-
-        # Uptime
-        boot_time = datetime.fromtimestamp(psutil.boot_time())
-        uptime = datetime.now() - boot_time
-        uptime_str = self._format_uptime(uptime)
+class SystemInfoModule(ModuleBase):
+    """Module to display system information"""
 
-        return {
+    name = "System Information"
+    description = "View server system information, resource usage, and uptime"
+    icon = "💻"
+    color = "#3b82f6"
+
+    ACTIONS = (
+        {
+            "id": "refresh",
+            "label": "🔄 Refresh Info",
+            "variant": "primary"
+        },
+    )
+
+    def __init__(self):
+        if psutil is None:
+            return
+
+        # Values that can't change while the process is running
+        self._static = {
             "hostname": platform.node(),
             "os": f"{platform.system()} {platform.release()}",
-            "cpu_usage": f"{cpu_percent}%",
-            "cpu_cores": cpu_count,
-            "memory_usage": f"{memory_used:.1f}GB / {memory_total:.1f}GB ({memory_percent}%)",
-            "disk_usage": f"{disk_used:.1f}GB / {disk_total:.1f}GB ({disk_percent}%)",
-            "uptime": uptime_str,
+            "cpu_cores": psutil.cpu_count(),
             "python_version": platform.python_version()
         }
 
-    def get_actions(self):
-        """Get available actions"""
-        return [
-            {
-                "id": "refresh",
-                "label": "🔄 Refresh Info",
-                "variant": "primary"
-            }
-        ]
+    def get_status(self):
+        """Get current system information"""
+        if psutil is None:
+            return {"error": "psutil is not installed"}
+
+        static = self._static
+        usage = _snapshot.read()
+        if "error" in usage:
+            return usage
+
+        return {
+            "hostname": static["hostname"],
+            "os": static["os"],
+            "cpu_usage": usage["cpu_usage"],
+            "cpu_cores": static["cpu_cores"],
+            "memory_usage": usage["memory_usage"],
+            "disk_usage": usage["disk_usage"],
+            "uptime": usage["uptime"],
+            "python_version": static["python_version"]
+        }
 
     def execute_action(self, action_id: str, params=None):
         """Execute action"""
@@ -96,18 +174,10 @@ class SystemInfoModule(ModuleBase):
         return bytes_value / (1024 ** 3)
 
     @staticmethod
-    def _format_uptime(uptime):
-        """Format uptime timedelta to readable string"""
-        days = uptime.days
-        hours, remainder = divmod(uptime.seconds, 3600)
-        minutes, seconds = divmod(remainder, 60)
-
-        parts = []
-        if days > 0:
-            parts.append(f"{days}d")
-        if hours > 0:
-            parts.append(f"{hours}h")
-        if minutes > 0:
-            parts.append(f"{minutes}m")
-
-        return " ".join(parts) if parts else "< 1m"
+    def _format_uptime(total_seconds: int) -> str:
+        """Format whole seconds of uptime, e.g. 2d 3h 15m"""
+        days, rest = divmod(total_seconds, 86400)
+        hours, rest = divmod(rest, 3600)
+        minutes = rest // 60
+        text = (f"{days}d " if days else "") + (f"{hours}h " if hours else "") + (f"{minutes}m" if minutes else "")
+        return text.rstrip() or "< 1m"
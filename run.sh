@@ -29,4 +29,4 @@ echo ""
 
 # Run the FastAPI app with Uvicorn
 cd backend
-uvicorn app:app --host 0.0.0.0 --port 5001 --reload
+uvicorn app:app --host 0.0.0.0 --port 5001 --loop uvloop --http httptools --reload